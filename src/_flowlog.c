@@ -0,0 +1,216 @@
+/*
+ * Optional C counter for the flow log parser in main.py, loaded with ctypes.
+ * main.py falls back to pure Python when this library has not been built.
+ *
+ * Build (Linux/macOS):  cc -O2 -shared -fPIC -o src/_flowlog.so src/_flowlog.c
+ * Build (Windows/MSVC): cl /O2 /LD src\_flowlog.c /Fe:src\_flowlog.dll
+ *
+ * Counts each distinct (destination port, protocol number) pair, keeping the
+ * pairs in the order they are first seen, so the output matches the Python
+ * parser exactly.
+ */
+
+#include <stdint.h>
+#include <stdlib.h>
+#include <string.h>
+
+#ifdef _WIN32
+#define EXPORT __declspec(dllexport)
+#else
+#define EXPORT
+#endif
+
+/* Field positions of the destination port and protocol in a flow log line */
+#define DSTPORT_FIELD 6
+#define PROTOCOL_FIELD 7
+/* Longest number accepted, so the value always fits in 32 bits */
+#define MAX_DIGITS 9
+
+typedef struct {
+    /* Pairs packed as port << 32 | protocol, in first-seen order */
+    uint64_t *keys;
+    /* Count of each pair in keys */
+    int64_t *counts;
+    /* Number of distinct pairs */
+    size_t size;
+    /* Open-addressing table of indexes into keys, -1 for an empty slot */
+    int64_t *slots;
+    /* Number of slots minus one; the number of slots is a power of two */
+    size_t mask;
+} flowlog_counter;
+
+static int is_space(char c)
+{
+    /* The same ASCII whitespace set as bytes.split() */
+    return c == ' ' || c == '\t' || c == '\n' || c == '\r' || c == '\v' ||
+           c == '\f';
+}
+
+static size_t hash_key(uint64_t key)
+{
+    key ^= key >> 33;
+    key *= 0xff51afd7ed558ccdULL;
+    key ^= key >> 33;
+    return (size_t)key;
+}
+
+static int grow(flowlog_counter *counter)
+{
+    size_t slot_count = (counter->mask + 1) * 2;
+    int64_t *slots = malloc(slot_count * sizeof(int64_t));
+    uint64_t *keys = realloc(counter->keys, slot_count / 2 * sizeof(uint64_t));
+    int64_t *counts;
+    size_t i;
+
+    if (keys != NULL) {
+        counter->keys = keys;
+    }
+    counts = realloc(counter->counts, slot_count / 2 * sizeof(int64_t));
+    if (counts != NULL) {
+        counter->counts = counts;
+    }
+    if (slots == NULL || keys == NULL || counts == NULL) {
+        free(slots);
+        return -1;
+    }
+    memset(slots, 0xff, slot_count * sizeof(int64_t));
+    for (i = 0; i < counter->size; i++) {
+        size_t slot = hash_key(counter->keys[i]) & (slot_count - 1);
+        while (slots[slot] >= 0) {
+            slot = (slot + 1) & (slot_count - 1);
+        }
+        slots[slot] = (int64_t)i;
+    }
+    free(counter->slots);
+    counter->slots = slots;
+    counter->mask = slot_count - 1;
+    return 0;
+}
+
+static int add(flowlog_counter *counter, uint64_t key)
+{
+    size_t slot = hash_key(key) & counter->mask;
+    while (counter->slots[slot] >= 0) {
+        int64_t index = counter->slots[slot];
+        if (counter->keys[index] == key) {
+            counter->counts[index]++;
+            return 0;
+        }
+        slot = (slot + 1) & counter->mask;
+    }
+    counter->slots[slot] = (int64_t)counter->size;
+    counter->keys[counter->size] = key;
+    counter->counts[counter->size] = 1;
+    counter->size++;
+    /* Keep the table at most half full, which also keeps keys in bounds */
+    if (counter->size * 2 >= counter->mask + 1) {
+        return grow(counter);
+    }
+    return 0;
+}
+
+/* Parses the unsigned decimal number in [p, end), or returns -1 */
+static int64_t parse_number(const char *p, const char *end)
+{
+    int64_t value = 0;
+    if (end - p < 1 || end - p > MAX_DIGITS) {
+        return -1;
+    }
+    for (; p < end; p++) {
+        if (*p < '0' || *p > '9') {
+            return -1;
+        }
+        value = value * 10 + (*p - '0');
+    }
+    return value;
+}
+
+EXPORT flowlog_counter *flowlog_new(void)
+{
+    flowlog_counter *counter = calloc(1, sizeof(flowlog_counter));
+    if (counter == NULL) {
+        return NULL;
+    }
+    /* grow() doubles this to 1024 slots */
+    counter->mask = 511;
+    if (grow(counter) != 0) {
+        free(counter->keys);
+        free(counter->counts);
+        free(counter);
+        return NULL;
+    }
+    return counter;
+}
+
+EXPORT void flowlog_free(flowlog_counter *counter)
+{
+    if (counter != NULL) {
+        free(counter->keys);
+        free(counter->counts);
+        free(counter->slots);
+        free(counter);
+    }
+}
+
+/*
+ * Counts every line in buf, which must hold whole lines only. Returns 0, or
+ * -1 if a line is not in the expected format or memory runs out, in which
+ * case the caller re-parses the data in Python.
+ */
+EXPORT int flowlog_feed(flowlog_counter *counter, const char *buf,
+                        int64_t len)
+{
+    const char *p = buf;
+    const char *end = buf + len;
+
+    while (p < end) {
+        const char *line_end = memchr(p, '\n', (size_t)(end - p));
+        const char *field_start[PROTOCOL_FIELD + 1];
+        const char *field_end[PROTOCOL_FIELD + 1];
+        int64_t port, protocol;
+        int field = 0;
+
+        if (line_end == NULL) {
+            line_end = end;
+        }
+        while (field <= PROTOCOL_FIELD) {
+            while (p < line_end && is_space(*p)) {
+                p++;
+            }
+            if (p == line_end) {
+                return -1;
+            }
+            field_start[field] = p;
+            while (p < line_end && !is_space(*p)) {
+                p++;
+            }
+            field_end[field] = p;
+            field++;
+        }
+        port = parse_number(field_start[DSTPORT_FIELD],
+                            field_end[DSTPORT_FIELD]);
+        protocol = parse_number(field_start[PROTOCOL_FIELD],
+                                field_end[PROTOCOL_FIELD]);
+        if (port < 0 || protocol < 0) {
+            return -1;
+        }
+        if (add(counter, (uint64_t)port << 32 | (uint64_t)protocol) != 0) {
+            return -1;
+        }
+        p = line_end < end ? line_end + 1 : end;
+    }
+    return 0;
+}
+
+EXPORT int64_t flowlog_size(const flowlog_counter *counter)
+{
+    return (int64_t)counter->size;
+}
+
+/* Copies the packed pairs and their counts, in first-seen order */
+EXPORT void flowlog_items(const flowlog_counter *counter, uint64_t *keys,
+                          int64_t *counts)
+{
+    memcpy(keys, counter->keys, counter->size * sizeof(uint64_t));
+    memcpy(counts, counter->counts, counter->size * sizeof(int64_t));
+}
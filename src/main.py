@@ -7,7 +7,112 @@ Author: Natalie Ivers
 
 # Requirement: Only include native python libraries
 import os
+import sys
 import csv
+import ctypes
+import functools
+import mmap
+from collections import Counter
+from itertools import chain, repeat
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from operator import itemgetter
+
+
+def load_flowlog_library():
+    """
+    Loads the optional C flow log counter built from _flowlog.c, which
+    sits next to this file. See _flowlog.c for build instructions.
+
+    Returns:
+        ctypes.CDLL: the loaded library, or None if it has not been built
+    """
+    library_name = '_flowlog.dll' if os.name == 'nt' else '_flowlog.so'
+    library_path = os.path.join(
+        os.path.dirname(os.path.abspath(__file__)), library_name
+    )
+    try:
+        library = ctypes.CDLL(library_path)
+    except OSError:
+        return None
+    library.flowlog_new.restype = ctypes.c_void_p
+    library.flowlog_new.argtypes = []
+    library.flowlog_free.restype = None
+    library.flowlog_free.argtypes = [ctypes.c_void_p]
+    library.flowlog_feed.restype = ctypes.c_int
+    library.flowlog_feed.argtypes = [
+        ctypes.c_void_p, ctypes.c_void_p, ctypes.c_int64
+    ]
+    library.flowlog_size.restype = ctypes.c_int64
+    library.flowlog_size.argtypes = [ctypes.c_void_p]
+    library.flowlog_items.restype = None
+    library.flowlog_items.argtypes = [
+        ctypes.c_void_p,
+        ctypes.POINTER(ctypes.c_uint64),
+        ctypes.POINTER(ctypes.c_int64)
+    ]
+    return library
+
+
+flowlog_library = load_flowlog_library()
+
+
+@functools.lru_cache(maxsize=8)
+def read_protocol_numbers_file(path, mtime):
+    """
+    Reads a protocol numbers file and returns a tuple of protocol keywords
+    indexed by protocol number. Results are cached, so mtime is only part
+    of the cache key, making a modified file be read again.
+
+    Protocol numbers are a dense range from 0 to 255, so indexing a tuple
+    avoids hashing the number on every lookup. Numbers missing from the
+    file map to 'unknown', and rows with numbers outside 0 to 255 are
+    skipped.
+
+    From:
+        https://www.iana.org/assignments/protocol-numbers/protocol-numbers.xhtml
+
+    Args:
+        path (str): path to the protocol numbers file
+        mtime (float): modification time of the file
+
+    Returns:
+        tuple: 256 protocol keywords indexed by protocol number
+    """
+    protocol_keywords = ['unknown'] * 256
+    try:
+        with open(path, 'r', encoding='utf-8') as file:
+            # Index rows by column position rather than building a dict
+            # per row with csv.DictReader
+            reader = csv.reader(file)
+            header = next(reader, None)
+            if not header:
+                raise ValueError(
+                    "Protocol numbers file is empty or missing headers."
+                )
+            decimal_index = header.index('Decimal')
+            keyword_index = header.index('Keyword')
+            for row in reader:
+                # Skip blank rows, as csv.DictReader did
+                if not row:
+                    continue
+                protocol_number = int(row[decimal_index])
+                # Skip numbers outside the table; a negative index would
+                # silently replace an entry counted from the end
+                if not 0 <= protocol_number < len(protocol_keywords):
+                    continue
+                # Intern keywords so every entry sharing a protocol
+                # shares one string object
+                protocol_keyword = sys.intern(row[keyword_index].lower())
+                protocol_keywords[protocol_number] = protocol_keyword
+    except FileNotFoundError as e:
+        print(f"Error reading protocol numbers file: {e}")
+        exit(1)
+    except IOError as e:
+        print(f"Error reading protocol numbers file: {e}")
+        exit(1)
+    # A tuple, since the cached result is shared between callers
+    return tuple(protocol_keywords)
 
 
 class FlowLogProcessor:
@@ -21,16 +126,33 @@ class FlowLogProcessor:
 
     Methods:
         read_protocol_numbers(): Reads a protocol numbers file and returns
-            a dictionary of protocol number to keyword.
-        parse_flow_log(protocol_dict): Parses a flow log file and returns a
-            list of tuples containing destination port and protocol keyword.
+            a tuple of protocol keywords indexed by protocol number, cached
+            until the file changes.
+        split_flow_log(): Splits the flow log file into line-aligned byte
+            ranges, one per worker process.
+        read_flow_log(start, end): Reads a flow log file through a memory
+            map and yields blocks of whole lines.
+        parse_flow_log(start, end): Parses a flow log file and returns an
+            iterator over keys made of the raw destination port and protocol
+            number.
+        parse_flow_log_block(block): Parses a block of whole flow log lines
+            into the same keys.
         read_lookup_table(): Reads a lookup table file and returns a dictionary
             of (destination port, protocol) to tag.
-        map_tags(parsed_log, lookup_table): Maps tags to each flow log entry.
-        count_tags(dest_protocol_tuples, lookup_table): Counts the number of
-            times each tag appears in the flow log.
-        count_port_protocol(dest_protocol_tuples): Counts the number of times
-            each (destination port, protocol) tuple appears in the flow log.
+        get_executor(worker_count): Returns a pool of worker processes,
+            reused across runs.
+        count_flow_log_range(start, end): Counts the number of times each
+            raw destination port and protocol number key appears in one
+            byte range of the flow log.
+        count_flow_log_range_native(start, end): Counts one byte range of
+            the flow log with the optional C library.
+        count_flow_log(): Counts the number of times each raw key appears
+            in the flow log, splitting large logs across worker processes.
+        count_port_protocol(raw_counts, protocol_keywords): Counts the
+            number of times each (destination port, protocol) tuple appears
+            in the flow log, from the counts of the raw fields.
+        count_tags(tuple_counts, lookup_table): Counts the number of times
+            each tag appears in the flow log.
         output_results(tag_counts, tuple_counts): Outputs the tag and tuple
             counts to CSV files. The output is sorted by count, descending.
         process(): Main method to parse inputted flow log and lookup table,
@@ -42,69 +164,177 @@ class FlowLogProcessor:
     lookup_table_path = "data/lookup_table.csv"
     output_path = "output/"
 
+    # Number of bytes of the flow log parsed at a time
+    read_chunk_size = 1 << 20
+
+    # Number of worker processes the flow log is split across, and the
+    # smallest flow log (in bytes) that is worth splitting
+    worker_count = os.cpu_count() or 1
+    parallel_min_size = 8 << 20
+
+    # Worker process pools keyed by worker count, shared by every instance
+    # so that repeated runs skip starting new processes
+    _executors = {}
+
+    # Count with the C library from _flowlog.c when it has been built
+    use_flowlog_library = True
+
     def read_protocol_numbers(self):
         """
-        Reads a protocol numbers file and returns a dictionary of
-        protocol number to keyword.
+        Reads a protocol numbers file and returns a tuple of protocol
+        keywords indexed by protocol number.
 
-        From:
-            https://www.iana.org/assignments/protocol-numbers/protocol-numbers.xhtml
+        The file is static IANA data, so the result is cached by path and
+        modification time and only re-read when the file changes.
 
         Returns:
-            dict: dictionary of protocol number to keyword
+            tuple: 256 protocol keywords indexed by protocol number
         """
-        protocol_dict = {}
         try:
-            with open(self.protocol_dict_path, 'r', encoding='utf-8') as file:
-                reader = csv.DictReader(file)
-                if not reader.fieldnames:
-                    raise ValueError(
-                        "Protocol numbers file is empty or missing headers."
-                    )
-                for row in reader:
-                    protocol_number = int(row['Decimal'])
-                    protocol_keyword = row['Keyword'].lower()
-                    protocol_dict[protocol_number] = protocol_keyword
+            mtime = os.path.getmtime(self.protocol_dict_path)
+        except OSError:
+            # Leave reporting the missing file to read_protocol_numbers_file
+            mtime = None
+        return read_protocol_numbers_file(self.protocol_dict_path, mtime)
+
+    def split_flow_log(self):
+        """
+        Splits the flow log file into one byte range per worker process.
+        Every range starts at the beginning of a line, so no entry is
+        split between two ranges. Files smaller than parallel_min_size are
+        kept as a single range.
+
+        Returns:
+            list: list of (start, end) byte offsets
+        """
+        try:
+            with open(self.flow_log_path, 'rb') as file:
+                size = os.fstat(file.fileno()).st_size
+                count = self.worker_count
+                if size < self.parallel_min_size or count < 2:
+                    return [(0, size)]
+                boundaries = [0]
+                for i in range(1, count):
+                    file.seek(max(size * i // count, boundaries[-1]))
+                    # Move the boundary forward to the start of a line
+                    file.readline()
+                    boundaries.append(file.tell())
+                boundaries.append(size)
         except FileNotFoundError as e:
-            print(f"Error reading protocol numbers file: {e}")
+            print(f"Error reading flow log file: {e}")
             exit(1)
         except IOError as e:
-            print(f"Error reading protocol numbers file: {e}")
+            print(f"Error reading flow log file: {e}")
             exit(1)
-        return protocol_dict
+        return [
+            (start, end)
+            for start, end in zip(boundaries, boundaries[1:])
+            if start < end
+        ]
 
-    def parse_flow_log(self, protocol_dict):
+    def read_flow_log(self, start=0, end=None):
         """
-        Parses a flow log file and returns a list of tuples
-        containing destination port and protocol keyword.
+        Reads a flow log file through a memory map in large blocks rather
+        than line by line, and yields blocks of whole lines.
 
         Args:
-            protocol_dict (dict): dictionary of protocol number to keyword
+            start (int): byte offset of the first line to read
+            end (int): byte offset to stop reading at, or None to read to the
+                end of the file
 
-        Returns:
-            list: list of tuples containing destination port and protocol
-                keyword
+        Yields:
+            bytes: block of whole lines; every block but the last ends with
+                a newline
         """
-        parsed_log = []
         try:
-            with open(self.flow_log_path, 'r', encoding='utf-8') as file:
-                for line in file:
-                    fields = line.strip().split()
-                    protocol_number = int(fields[7])
-                    protocol_keyword = protocol_dict.get(
-                        protocol_number, 'unknown'
-                    )
-                    # Replace protocol number
-                    # with string and append
-                    fields[7] = protocol_keyword.lower()
-                    parsed_log.append(fields)
+            with open(self.flow_log_path, 'rb') as file:
+                size = os.fstat(file.fileno()).st_size
+                end = size if end is None else min(end, size)
+                if start >= end:
+                    # An empty file cannot be mapped
+                    return
+                # Map only this range, from the allocation boundary at or
+                # before its start, so each worker maps its own slice
+                offset = start - start % mmap.ALLOCATIONGRANULARITY
+                with mmap.mmap(
+                    file.fileno(), end - offset, access=mmap.ACCESS_READ,
+                    offset=offset
+                ) as mapped:
+                    if hasattr(mmap, 'MADV_SEQUENTIAL'):
+                        # Hint the kernel to read ahead (Unix only)
+                        mapped.madvise(mmap.MADV_SEQUENTIAL)
+                    position = start - offset
+                    end -= offset
+                    while position < end:
+                        stop = min(position + self.read_chunk_size, end)
+                        if stop < end:
+                            # End the block after its last full line, or
+                            # after the first line if that is longer
+                            cut = mapped.rfind(b'\n', position, stop)
+                            if cut < 0:
+                                cut = mapped.find(b'\n', stop, end)
+                            stop = end if cut < 0 else cut + 1
+                        yield mapped[position:stop]
+                        position = stop
         except FileNotFoundError as e:
             print(f"Error reading flow log file: {e}")
             exit(1)
         except IOError as e:
             print(f"Error reading flow log file: {e}")
             exit(1)
-        return parsed_log
+
+    def parse_flow_log(self, start=0, end=None):
+        """
+        Parses a flow log file and returns an iterator over a key made of
+        the raw destination port and protocol number fields of each entry.
+
+        Entries are produced as each block of the file is read, so the
+        parsed log is never held in memory as a whole. Only the destination
+        port and protocol fields are extracted from each entry, and they
+        are left as bytes so that each distinct value only has to be
+        converted to an integer once, after counting. Joining the two fields
+        into one bytes key means counting hashes a single object per entry
+        instead of a tuple.
+
+        Args:
+            start (int): byte offset of the first line to parse
+            end (int): byte offset to stop parsing at, or None to parse to
+                the end of the file
+
+        Returns:
+            iterator: keys of the destination port and protocol number
+                separated by a space, e.g. b'443 6'
+        """
+        # Chain the per-block iterators in C rather than re-yielding every
+        # entry from a Python generator
+        return chain.from_iterable(map(
+            self.parse_flow_log_block, self.read_flow_log(start, end)
+        ))
+
+    def parse_flow_log_block(self, block):
+        """
+        Parses a block of whole flow log lines and returns an iterator over
+        a key made of the raw destination port and protocol number fields of
+        each entry. Only those two fields are split out of each line.
+
+        Args:
+            block (bytes): block of whole lines from the flow log
+
+        Returns:
+            iterator: keys of the destination port and protocol number
+                separated by a space, e.g. b'443 6'
+        """
+        get_fields = itemgetter(6, 7)
+        join_fields = b' '.join
+        lines = block.split(b'\n')
+        if block.endswith(b'\n'):
+            lines.pop()
+        # HOT: runs once per line when the C counter is not built.
+        # Chained maps of C functions, so no Python code runs per line.
+        # Split at most 8 times, so the trailing fields stay joined
+        return map(join_fields, map(get_fields, map(
+            bytes.split, lines, repeat(None), repeat(8)
+        )))
 
     def read_lookup_table(self):
         """
@@ -117,23 +347,34 @@ class FlowLogProcessor:
         lookup_table = {}
         try:
             with open(self.lookup_table_path, 'r', encoding='utf-8') as file:
-                reader = csv.DictReader(file)
+                reader = csv.reader(file)
                 # Strip whitespace from fieldnames
-                reader.fieldnames = [
-                    field.strip() for field in reader.fieldnames
-                ]
+                fieldnames = [field.strip() for field in next(reader, [])]
                 required_fields = {'dstport', 'protocol', 'tag'}
-                if not reader.fieldnames or not required_fields.issubset(
-                    reader.fieldnames
+                if not fieldnames or not required_fields.issubset(
+                    fieldnames
                 ):
                     raise ValueError(
                         "Lookup table file is empty or "
                         "missing required headers."
                     )
+                # Index rows by column position rather than building a
+                # dict for each row
+                dstport_index = fieldnames.index('dstport')
+                protocol_index = fieldnames.index('protocol')
+                tag_index = fieldnames.index('tag')
                 for row in reader:
-                    dstport = int(row['dstport'].strip())
-                    protocol = row['protocol'].strip().lower()
-                    tag = row['tag'].strip().lower()
+                    # Skip blank lines
+                    if not row:
+                        continue
+                    dstport = int(row[dstport_index].strip())
+                    # Intern protocols so they are the same objects as the
+                    # protocol keywords, and tags so rows sharing a tag
+                    # share one string
+                    protocol = sys.intern(
+                        row[protocol_index].strip().lower()
+                    )
+                    tag = sys.intern(row[tag_index].strip().lower())
                     lookup_table[(dstport, protocol)] = tag
         except FileNotFoundError as e:
             print(f"Error reading lookup table file: {e}")
@@ -143,63 +384,209 @@ class FlowLogProcessor:
             exit(1)
         return lookup_table
 
-    def map_tags(self, parsed_log, lookup_table):
+    def get_executor(self, worker_count):
         """
-        Maps tags to each flow log entry.
+        Returns a pool of worker_count worker processes, starting one on
+        the first request for that count and reusing it afterwards.
 
         Args:
-            parsed_log (list): list of flow log entries
-            lookup_table (dict): dictionary of (destination port, protocol)
-                to tag
+            worker_count (int): number of worker processes
 
         Returns:
-            list: list of flow log entries with tags
+            ProcessPoolExecutor: pool of worker processes
         """
-        tagged_log = []
-        for entry in parsed_log:
-            dest_port = int(entry[6])
-            protocol = entry[7]
-            tag = lookup_table.get((dest_port, protocol), 'untagged')
-            entry.append(tag)
-            tagged_log.append(entry)
-        return tagged_log
-
-    def count_tags(self, tagged_log):
+        executor = self._executors.get(worker_count)
+        if executor is None:
+            executor = ProcessPoolExecutor(worker_count)
+            FlowLogProcessor._executors[worker_count] = executor
+        return executor
+
+    def count_flow_log_range(self, start, end):
         """
-        Counts the number of times each tag appears in the flow log.
+        Counts the number of times each raw destination port and protocol
+        number key appears in one byte range of the flow log.
+
+        Uses the C library from _flowlog.c when it is available, and the
+        Python parser otherwise.
 
         Args:
-            tagged_log (list): list of flow log entries with tags
+            start (int): byte offset of the first line to count
+            end (int): byte offset to stop counting at
 
         Returns:
-            dict: dictionary of tag to count
+            dict: dictionary of raw b'port protocol' key to count
         """
-        tag_counts = {}
-        for entry in tagged_log:
-            tag = entry[-1]  # The tag is the last element in the entry
-            tag_counts[tag] = tag_counts.get(tag, 0) + 1
-        return tag_counts
+        if flowlog_library is not None and self.use_flowlog_library:
+            raw_counts = self.count_flow_log_range_native(start, end)
+            if raw_counts is not None:
+                return raw_counts
+        # Counter tallies an iterable in C, one hash lookup per entry
+        return Counter(self.parse_flow_log(start, end))
+
+    def count_flow_log_range_native(self, start, end):
+        """
+        Counts the number of times each destination port and protocol
+        number appears in one byte range of the flow log with the C library
+        from _flowlog.c, which keeps Python out of the per-line loop. The
+        file is memory-mapped and parsed in place.
+
+        Args:
+            start (int): byte offset of the first line to count
+            end (int): byte offset to stop counting at
 
-    def count_dest_protocol(self, tagged_log):
+        Returns:
+            dict: dictionary of b'port protocol' key to count, or None if a
+                line is not in the expected format and the range has to be
+                re-parsed in Python
+        """
+        if start >= end:
+            return {}
+        counter = flowlog_library.flowlog_new()
+        if not counter:
+            return None
+        try:
+            try:
+                # Map the range and hand the C library a pointer into the
+                # mapping, so the range is parsed in place without being
+                # copied into Python objects. ACCESS_COPY gives a private
+                # mapping, which ctypes needs in order to take its address,
+                # and nothing is ever written to it. The mapping starts at
+                # the allocation boundary at or before the range
+                offset = start - start % mmap.ALLOCATIONGRANULARITY
+                with open(self.flow_log_path, 'rb') as file, mmap.mmap(
+                    file.fileno(), end - offset, access=mmap.ACCESS_COPY,
+                    offset=offset
+                ) as mapped:
+                    # HOT: the whole range is tokenized and counted in C
+                    buffer = ctypes.c_char.from_buffer(mapped)
+                    try:
+                        failed = flowlog_library.flowlog_feed(
+                            counter, ctypes.addressof(buffer) + start - offset,
+                            end - start
+                        )
+                    finally:
+                        # The mapping cannot close while ctypes references it
+                        del buffer
+            except FileNotFoundError as e:
+                print(f"Error reading flow log file: {e}")
+                exit(1)
+            except IOError as e:
+                print(f"Error reading flow log file: {e}")
+                exit(1)
+            if failed:
+                return None
+            size = flowlog_library.flowlog_size(counter)
+            keys = (ctypes.c_uint64 * size)()
+            counts = (ctypes.c_int64 * size)()
+            flowlog_library.flowlog_items(counter, keys, counts)
+        finally:
+            flowlog_library.flowlog_free(counter)
+        # Keys are packed as port << 32 | protocol number
+        return {
+            b'%d %d' % (key >> 32, key & 0xFFFFFFFF): count
+            for key, count in zip(keys, counts)
+        }
+
+    def count_flow_log(self):
+        """
+        Counts the number of times each raw destination port and protocol
+        number key appears in the flow log.
+
+        Large flow logs are split into byte ranges that are parsed and
+        counted in parallel worker processes, then the counts from each
+        range are added together in file order.
+
+        Returns:
+            dict: dictionary of raw b'port protocol' key to count
+        """
+        ranges = self.split_flow_log()
+        if len(ranges) == 1:
+            start, end = ranges[0]
+            return self.count_flow_log_range(start, end)
+
+        starts, ends = zip(*ranges)
+        raw_counts = {}
+        get_count = raw_counts.get
+        executor = self.get_executor(len(ranges))
+        try:
+            for range_counts in executor.map(
+                self.count_flow_log_range, starts, ends
+            ):
+                for key, count in range_counts.items():
+                    raw_counts[key] = get_count(key, 0) + count
+        except BrokenProcessPool:
+            # A worker died, e.g. in the C library, and the pool cannot be
+            # used again. Drop it so the next run starts a new one
+            FlowLogProcessor._executors.pop(len(ranges), None)
+            executor.shutdown(wait=False)
+            raise
+        return raw_counts
+
+    def count_port_protocol(self, raw_counts, protocol_keywords):
         """
         Counts the number of times each (destination port, protocol) tuple
-        appears in the flow log.
+        appears in the flow log, from the counts of the raw fields.
+
+        Each distinct raw key is converted once. Distinct raw keys can
+        still share a port and keyword, e.g. unknown protocol numbers, so
+        their counts are added together.
 
         Args:
-            tagged_log (list): list of flow log entries with tags
+            raw_counts (dict): dictionary of raw b'port protocol' key to
+                count
+            protocol_keywords (tuple): protocol keywords indexed by protocol
+                number
 
         Returns:
             dict: dictionary of (destination port, protocol) tuple to count
         """
+        # HOT: runs once per distinct raw key, which can be close to once
+        # per line when ports vary widely.
+        # Most keys are new to the result, so a plain dict is used: a
+        # Counter would call its Python-level __missing__ for each of them
         tuple_counts = {}
-        for entry in tagged_log:
-            dest_port = int(entry[6])
-            protocol = entry[7].lower()
-            tuple_counts[(dest_port, protocol)] = tuple_counts.get(
-                (dest_port, protocol), 0
-            ) + 1
+        get_count = tuple_counts.get
+        protocol_count = len(protocol_keywords)
+        for key, count in raw_counts.items():
+            dest_port, protocol_number = key.split()
+            protocol_number = int(protocol_number)
+            if 0 <= protocol_number < protocol_count:
+                protocol = protocol_keywords[protocol_number]
+            else:
+                protocol = 'unknown'
+            entry = (int(dest_port), protocol)
+            tuple_counts[entry] = get_count(entry, 0) + count
         return tuple_counts
 
+    def count_tags(self, tuple_counts, lookup_table):
+        """
+        Counts the number of times each tag appears in the flow log.
+
+        Tags are looked up once per distinct (destination port, protocol)
+        tuple rather than once per flow log entry, since every entry
+        sharing a tuple shares its tag. Protocols are lowercased once, when
+        the protocol numbers file and lookup table are read, so both sides
+        are compared without normalising them again.
+
+        Args:
+            tuple_counts (dict): dictionary of (destination port, protocol)
+                tuple to count
+            lookup_table (dict): dictionary of (destination port, protocol)
+                to tag
+
+        Returns:
+            dict: dictionary of tag to count
+        """
+        # map calls lookup_table.get from C, with no Python-level call or
+        # attribute lookup per tuple; zip pulls one tag per iteration, so
+        # each probe is followed by its count update
+        tags = map(lookup_table.get, tuple_counts, repeat('untagged'))
+        tag_counts = {}
+        get_count = tag_counts.get
+        for tag, count in zip(tags, tuple_counts.values()):
+            tag_counts[tag] = get_count(tag, 0) + count
+        return tag_counts
+
     def output_results(self, tag_counts, tuple_counts):
         """
         Outputs the tag and tuple counts to CSV files.
@@ -213,6 +600,10 @@ class FlowLogProcessor:
         Returns:
             None
         """
+        # Sort items by count with a C-level key function rather than a
+        # lambda, which would be called in Python for every item
+        get_count = itemgetter(1)
+
         # Output tag count to CSV
         os.makedirs(self.output_path, exist_ok=True)
         with open(
@@ -220,11 +611,14 @@ class FlowLogProcessor:
             'w',
             encoding='utf-8'
         ) as file:
-            file.write('Tag,Count\n')
-            for tag, count in sorted(
-                tag_counts.items(), key=lambda item: item[1], reverse=True
-            ):
-                file.write(f'{tag},{count}\n')
+            # Build the whole file and write it in a single call
+            lines = ['Tag,Count\n']
+            lines.extend(
+                f'{tag},{count}\n' for tag, count in sorted(
+                    tag_counts.items(), key=get_count, reverse=True
+                )
+            )
+            file.write(''.join(lines))
 
         # Output tuple count to CSV
         with open(
@@ -232,11 +626,14 @@ class FlowLogProcessor:
             'w',
             encoding='utf-8'
         ) as file:
-            file.write('Port,Protocol,Count\n')
-            for (dest_port, protocol), count in sorted(
-                tuple_counts.items(), key=lambda item: item[1], reverse=True
-            ):
-                file.write(f'{dest_port},{protocol},{count}\n')
+            lines = ['Port,Protocol,Count\n']
+            lines.extend(
+                f'{dest_port},{protocol},{count}\n'
+                for (dest_port, protocol), count in sorted(
+                    tuple_counts.items(), key=get_count, reverse=True
+                )
+            )
+            file.write(''.join(lines))
 
     def run(self):
         """
@@ -246,31 +643,34 @@ class FlowLogProcessor:
         print("Starting FlowLogProcessor...")
 
         # Parse Input Data
-        print("Reading protocol numbers...")
-        protocol_dict = self.read_protocol_numbers()
-        print("Protocol numbers read successfully.")
-
-        print("Parsing flow log...")
-        parsed_log = self.parse_flow_log(protocol_dict)
-        print("Flow log parsed successfully.")
-
-        print("Reading lookup table...")
-        lookup_table = self.read_lookup_table()
-        print("Lookup table read successfully.")
+        # The protocol numbers and lookup table are read in two threads.
+        # Both are finished, and their threads joined, before the flow log
+        # is counted: a read error then exits before the expensive count,
+        # and worker processes are never forked while threads are running
+        print("Reading protocol numbers and lookup table...")
+        with ThreadPoolExecutor(2) as executor:
+            protocol_future = executor.submit(self.read_protocol_numbers)
+            lookup_future = executor.submit(self.read_lookup_table)
+            protocol_keywords = protocol_future.result()
+            lookup_table = lookup_future.result()
+        print("Protocol numbers and lookup table read successfully.")
+
+        # The flow log is parsed lazily, as it is being counted
+        print("Parsing and counting flow log...")
+        raw_counts = self.count_flow_log()
+        print("Flow log parsed and counted successfully.")
 
         # Process Data
-        print("Mapping tags to flow log entries...")
-        tagged_log = self.map_tags(parsed_log, lookup_table)
-        print("Tags mapped successfully.")
+        print("Counting destination port and protocol tuples...")
+        dest_protocol_counts = self.count_port_protocol(
+            raw_counts, protocol_keywords
+        )
+        print("Destination port and protocol tuples counted successfully.")
 
         print("Counting tags...")
-        tag_counts = self.count_tags(tagged_log)
+        tag_counts = self.count_tags(dest_protocol_counts, lookup_table)
         print("Tags counted successfully.")
 
-        print("Counting destination port and protocol tuples...")
-        dest_protocol_counts = self.count_dest_protocol(tagged_log)
-        print("Destination port and protocol tuples counted successfully.")
-
         # Output Results
         print("Outputting results...")
         self.output_results(tag_counts, dest_protocol_counts)
@@ -4,49 +4,78 @@ import random
 import time
 
 
-def generate_flow_log_entry():
-    """Generate a random flow log entry"""
+def random_ints(low, high, count):
+    """Generate count random integers between low and high, inclusive."""
+    # One choices() call draws the whole column, instead of one randint()
+    # call per entry
+    return random.choices(range(low, high + 1), k=count)
+
+
+def generate_flow_log_entries(num_entries):
+    """Generate a list of random flow log entries"""
     version = 2
     account_id = "123456789012"
-    eni_id = f"eni-{''.join(random.choices('abcdef0123456789', k=8))}"
-    srcaddr = (
-        f"{random.randint(1, 255)}."
-        f"{random.randint(0, 255)}."
-        f"{random.randint(0, 255)}."
-        f"{random.randint(0, 255)}"
-    )
-    dstaddr = (
-        f"{random.randint(1, 255)}."
-        f"{random.randint(0, 255)}."
-        f"{random.randint(0, 255)}."
-        f"{random.randint(0, 255)}"
+    hex_digits = ''.join(random.choices('abcdef0123456789', k=8 * num_entries))
+    eni_ids = [
+        f"eni-{hex_digits[i:i + 8]}" for i in range(0, 8 * num_entries, 8)
+    ]
+    srcaddrs = [
+        f"{a}.{b}.{c}.{d}" for a, b, c, d in zip(
+            random_ints(1, 255, num_entries),
+            random_ints(0, 255, num_entries),
+            random_ints(0, 255, num_entries),
+            random_ints(0, 255, num_entries)
+        )
+    ]
+    dstaddrs = [
+        f"{a}.{b}.{c}.{d}" for a, b, c, d in zip(
+            random_ints(1, 255, num_entries),
+            random_ints(0, 255, num_entries),
+            random_ints(0, 255, num_entries),
+            random_ints(0, 255, num_entries)
+        )
+    ]
+    dstports = random.choices(
+        [443, 23, 25, 110, 993, 143, 1024, 80], k=num_entries
     )
-    dstport = random.choice([443, 23, 25, 110, 993, 143, 1024, 80])
-    srcport = random.randint(49152, 65535)
+    srcports = random_ints(49152, 65535, num_entries)
 
     # Randomly choose the protocol
-    protocol = random.choice([6, 17, 1])  # 6: TCP, 17: UDP, 1: ICMP
+    # 6: TCP, 17: UDP, 1: ICMP
+    protocols = random.choices([6, 17, 1], k=num_entries)
 
-    packets = random.randint(5, 25)
-    bytes_transferred = random.randint(2000, 20000)
+    packets = random_ints(5, 25, num_entries)
+    bytes_transferred = random_ints(2000, 20000, num_entries)
     start_time = int(time.time())
-    end_time = start_time + random.randint(10, 60)
-    action = random.choice(["ACCEPT", "REJECT"])
+    durations = random_ints(10, 60, num_entries)
+    actions = random.choices(["ACCEPT", "REJECT"], k=num_entries)
     log_status = "OK"
 
-    return (
+    return [
         f"{version} {account_id} {eni_id} {srcaddr} {dstaddr} {dstport} "
-        f"{srcport} {protocol} {packets} {bytes_transferred} {start_time}"
-        f"{end_time} {action} {log_status}"
-    )
+        f"{srcport} {protocol} {packet_count} {byte_count} {start_time}"
+        f"{start_time + duration} {action} {log_status}"
+        for (
+            eni_id, srcaddr, dstaddr, dstport, srcport, protocol,
+            packet_count, byte_count, duration, action
+        ) in zip(
+            eni_ids, srcaddrs, dstaddrs, dstports, srcports, protocols,
+            packets, bytes_transferred, durations, actions
+        )
+    ]
+
+
+def generate_flow_log_entry():
+    """Generate a random flow log entry"""
+    return generate_flow_log_entries(1)[0]
 
 
 def generate_flow_log_file(filename, num_entries):
     """Generate a flow log file with the specified number of entries."""
+    entries = generate_flow_log_entries(num_entries)
     with open(filename, 'w') as file:
-        for _ in range(num_entries):
-            entry = generate_flow_log_entry()
-            file.write(entry + '\n')
+        # Write the whole file in a single call
+        file.write(''.join(entry + '\n' for entry in entries))
 
 
 if __name__ == "__main__":
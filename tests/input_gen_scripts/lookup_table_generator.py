@@ -5,10 +5,20 @@ import random
 import string
 
 
+def generate_random_tags(count, length=4):
+    """Generate count random tags of specified length."""
+    # Draw the characters of every tag in one choices() call, then slice
+    # the tags out of them, instead of one choices() call per tag
+    characters = ''.join(random.choices(
+        string.ascii_lowercase + string.digits, k=count * length))
+    return [
+        characters[i:i + length] for i in range(0, count * length, length)
+    ]
+
+
 def generate_random_tag(length=4):
     """Generate a random tag of specified length."""
-    return ''.join(random.choices(
-        string.ascii_lowercase + string.digits, k=length))
+    return generate_random_tags(1, length)[0]
 
 
 def generate_lookup_table(filename, num_entries):
@@ -17,11 +27,12 @@ def generate_lookup_table(filename, num_entries):
     with open(filename, 'w', newline='', encoding='utf-8') as file:
         writer = csv.writer(file)
         writer.writerow(['dstport', 'protocol', 'tag'])
-        for _ in range(num_entries):
-            dstport = random.randint(1, 65535)
-            protocol = random.choice(protocols)
-            tag = generate_random_tag()
-            writer.writerow([dstport, protocol, tag])
+        # Draw each column for every entry at once, then write all the rows
+        # in a single call
+        dstports = random.choices(range(1, 65536), k=num_entries)
+        protocol_column = random.choices(protocols, k=num_entries)
+        tags = generate_random_tags(num_entries)
+        writer.writerows(zip(dstports, protocol_column, tags))
 
 
 if __name__ == "__main__":
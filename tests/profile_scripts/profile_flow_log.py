@@ -0,0 +1,72 @@
+""" Profile the flow log processor on a large generated flow log. """
+
+import cProfile
+import io
+import os
+import pstats
+import sys
+import tempfile
+import time
+from contextlib import redirect_stdout
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(os.path.dirname(SCRIPT_DIR))
+sys.path.insert(0, os.path.join(REPO_DIR, 'src'))
+sys.path.insert(0, os.path.join(REPO_DIR, 'tests', 'input_gen_scripts'))
+
+from flow_log_generator import generate_flow_log_file  # noqa: E402
+from main import FlowLogProcessor  # noqa: E402
+
+
+def make_processor(flow_log_path, output_path):
+    """Create a processor that reads the given flow log."""
+    processor = FlowLogProcessor()
+    processor.protocol_dict_path = os.path.join(
+        REPO_DIR, 'data', 'protocol-numbers.csv')
+    processor.lookup_table_path = os.path.join(
+        REPO_DIR, 'tests', 'test_input', 'big_test_lookup_table.csv')
+    processor.flow_log_path = flow_log_path
+    processor.output_path = output_path
+    return processor
+
+
+def time_run(processor):
+    """Run the processor with its output silenced and return the seconds."""
+    start = time.perf_counter()
+    with redirect_stdout(io.StringIO()):
+        processor.run()
+    return time.perf_counter() - start
+
+
+def profile_run(processor, top):
+    """Run the processor under cProfile and print the slowest functions."""
+    profiler = cProfile.Profile()
+    with redirect_stdout(io.StringIO()):
+        profiler.runcall(processor.run)
+    stats = pstats.Stats(profiler)
+    stats.sort_stats('tottime').print_stats(top)
+
+
+if __name__ == "__main__":
+    # Kept next to this script, and ignored by git, so later runs reuse it
+    FILENAME = os.path.join(SCRIPT_DIR, "profile_flow_log.txt")
+    NUM_ENTRIES = 1000000  # Adjust the number of entries as needed
+    TOP_FUNCTIONS = 15  # Number of functions listed in each profile
+
+    if not os.path.exists(FILENAME):
+        print(f"Generating {NUM_ENTRIES} flow log entries in {FILENAME}...")
+        generate_flow_log_file(FILENAME, NUM_ENTRIES)
+
+    with tempfile.TemporaryDirectory() as output_dir:
+        processor = make_processor(FILENAME, output_dir)
+        print(f"Full run: {time_run(processor):.3f}s")
+
+        # cProfile only sees the calling process, so profile with a single
+        # worker, once with the optional C counter and once without it
+        processor.worker_count = 1
+        for use_library in (True, False):
+            processor.use_flowlog_library = use_library
+            state = 'on' if use_library else 'off'
+            print(f"\nSingle process, C counter {state}: "
+                  f"{time_run(processor):.3f}s")
+            profile_run(processor, TOP_FUNCTIONS)